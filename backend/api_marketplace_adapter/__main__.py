@@ -1,9 +1,10 @@
 """
 Main entry point for the API Marketplace Adapter application.
 """
-from api_marketplace_adapter.app import create_app
+from api_marketplace_adapter.app import create_app, warmup
 
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=False, host='0.0.0.0', port=5555) 
\ No newline at end of file
+    warmup()
+    app.run(debug=False, host='0.0.0.0', port=5555)
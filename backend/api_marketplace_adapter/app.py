@@ -1,37 +1,43 @@
 import os
-import anthropic
-from flask import Flask, request, jsonify, send_file
-import requests
+from flask import Flask, Response, request, jsonify, send_file
 import logging
 import json
+import re
 import shutil
 import tempfile
+import threading
+import time
+import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
+from api_marketplace_adapter import config
+from api_marketplace_adapter.transformers import converter_profiler
+from api_marketplace_adapter.transformers.script_compiler import compile_script
 from api_marketplace_adapter.transformers.script_manager import ScriptManager
 
 # Load environment variables
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Initialize Anthropic client with API key from environment variable
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
-logger.info("Using newer Anthropic client")
+# The Anthropic SDK is heavy to import, so the client is built on first use
+_client = None
+_client_lock = threading.Lock()
+
+# Node.js subprocesses for converter checks and profiling; threads are only
+# started on first submit
+_background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
+
+# /pipeline bundle scaffolding, kept apart so slow converter checks cannot
+# hold it up
+_scaffold_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="scaffold")
+
+BUDGET_MODES = ("warn", "reject", "off")
 
 # Initialize script manager
 script_manager = ScriptManager()
@@ -41,10 +47,33 @@ APIGEE_TEMPLATES_PATH = os.environ.get("APIGEE_TEMPLATES_PATH", os.path.join(os.
 NORTHBOUND_TEMPLATE_PATH = os.path.join(APIGEE_TEMPLATES_PATH, "northbound-api-key")
 SOUTHBOUND_TEMPLATE_PATH = os.path.join(APIGEE_TEMPLATES_PATH, "southbound-api-key")
 
-# Log the paths for debugging
-logger.info(f"APIGEE_TEMPLATES_PATH: {APIGEE_TEMPLATES_PATH}")
-logger.info(f"NORTHBOUND_TEMPLATE_PATH: {NORTHBOUND_TEMPLATE_PATH}")
-logger.info(f"SOUTHBOUND_TEMPLATE_PATH: {SOUTHBOUND_TEMPLATE_PATH}")
+_logging_configured = False
+
+def configure_logging():
+    """Set up file and console logging once per process."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    logging.basicConfig(
+        level=config.LOG_LEVEL,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOG_FILE),
+            logging.StreamHandler()
+        ]
+    )
+    _logging_configured = True
+
+def get_client():
+    """Return the shared Anthropic client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import anthropic
+                _client = anthropic.Anthropic(api_key=config.get_anthropic_api_key())
+                logger.info("Using newer Anthropic client")
+    return _client
 
 # Check if the Apigee templates exist
 def check_apigee_templates():
@@ -60,8 +89,50 @@ def check_apigee_templates():
     logger.info("Apigee templates found")
     return True
 
-# Check the templates on startup
-check_apigee_templates()
+def _read_template(path):
+    """
+    Read a template file through the cache.
+    
+    The cache is keyed on the file's modification time, so edits to the
+    mounted templates are picked up without a restart.
+    """
+    return _read_template_cached(path, os.stat(path).st_mtime_ns)
+
+@lru_cache(maxsize=256)
+def _read_template_cached(path, mtime_ns):
+    with open(path, 'r') as f:
+        return f.read()
+
+def _load_templates():
+    """Read every template file into the cache and return how many were loaded."""
+    count = 0
+    for template_path in (NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH):
+        for root, _, files in os.walk(template_path):
+            for file in files:
+                if file.endswith('.xml') or file.endswith('.js'):
+                    _read_template(os.path.join(root, file))
+                    count += 1
+    return count
+
+def warmup():
+    """
+    Do the one-off startup work that is kept out of module import.
+
+    Pre-fork servers should call this in the master process (see
+    gunicorn.conf.py) so workers inherit the loaded templates and script
+    index. Both are refreshed when the files or the script directory change. The Anthropic client is intentionally not built here because its
+    connection pool must not be shared across forked workers.
+    """
+    configure_logging()
+    logger.info(f"APIGEE_TEMPLATES_PATH: {APIGEE_TEMPLATES_PATH}")
+    logger.info(f"NORTHBOUND_TEMPLATE_PATH: {NORTHBOUND_TEMPLATE_PATH}")
+    logger.info(f"SOUTHBOUND_TEMPLATE_PATH: {SOUTHBOUND_TEMPLATE_PATH}")
+    templates_found = check_apigee_templates()
+    if templates_found:
+        logger.info(f"Loaded {_load_templates()} template files")
+    logger.info(f"Indexed {len(script_manager.list_scripts())} scripts")
+    _purge_expired_bundles()
+    return templates_found
 
 def extract_json_content(text):
     """
@@ -97,6 +168,27 @@ def extract_json_content(text):
     json_content = text[start_pos:end_pos].strip()
     return json_content
 
+def _generate_converters(non_camara_file, camara_file):
+    """Ask the model for request/response converter scripts and return its raw reply."""
+    message = get_client().messages.create(
+        model="claude-3-7-sonnet-20250219",
+        max_tokens=2048,
+        messages=[
+            {"role": "user", "content": f"Consider this target swagger specification: {camara_file}"},
+            {"role": "user", "content": f"Consider this source swagger specification: {non_camara_file}"},
+            {"role": "user", "content": f"Analyze each swagger specification and find a match For each API/path"
+                                        f"Analyze and match API properties and generate 2 simple typescript scripts. "
+                                        f"One that will convert source requests into target requests and the othert that "
+                                        f"will convert target responses into source responses."
+                                        f"Your response format should be a json placed under '```json' and at the end of all the typescript and json generated closed with  '```' ."
+                                        f"Create a typescript which will convert source requests to target requests"
+                                        f"Create a second typescript which will convert target responses into source responses"
+                                        f"Fields in this json are 'request_converter' and 'response_converter'. "
+             },
+        ]
+    )
+    return message.content[0].text
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for Docker."""
@@ -126,26 +218,7 @@ def process_parameters():
         output_save_location = output_data.get('save_location')
         output_swagger_url = output_data.get('output_swagger_url')
 
-        message = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=2048,
-            messages=[
-                {"role": "user", "content": f"Consider this target swagger specification: {camara_file}"},
-                {"role": "user", "content": f"Consider this source swagger specification: {non_camara_file}"},
-                {"role": "user", "content": f"Analyze each swagger specification and find a match For each API/path"
-                                            f"Analyze and match API properties and generate 2 simple typescript scripts. "
-                                            f"One that will convert source requests into target requests and the othert that "
-                                            f"will convert target responses into source responses."
-                                            f"Your response format should be a json placed under '```json' and at the end of all the typescript and json generated closed with  '```' ."
-                                            f"Create a typescript which will convert source requests to target requests"
-                                            f"Create a second typescript which will convert target responses into source responses"
-                                            f"Fields in this json are 'request_converter' and 'response_converter'. "
-                 },
-            ]
-        )
-        # Log the response from the external API
-        
-        raw_content = message.content[0].text
+        raw_content = _generate_converters(non_camara_file, camara_file)
         logger.info(f"Raw API response: {raw_content}")
         
         # Extract JSON content
@@ -166,7 +239,17 @@ def process_parameters():
                 "rs_test_data": "{}"
             }
     
-    except requests.exceptions.RequestException as e:
+    except ValueError as e:
+        # The Anthropic API key is not configured
+        logger.error(f"Error creating Anthropic client: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        # anthropic is imported lazily by get_client(), so its error types
+        # are only looked up once something has failed
+        import anthropic
+        if not isinstance(e, anthropic.APIError):
+            raise
+
         # Log the error
         logger.error(f"Error calling external API: {str(e)}")
         
@@ -213,8 +296,17 @@ def merge_apiproxy():
         "targetAuthType": "apiKey",
         "targetApiKey": "abc",
         "request_converter": "JS script",
-        "response_converter": "JS script"
+        "response_converter": "JS script",
+        "source_spec": "source swagger (optional, for profiling payloads)",
+        "target_spec": "target swagger (optional, for profiling payloads)",
+        "latencyBudgetMs": 25,
+        "latencyBudgetMode": "warn"
     }
+    
+    When CONVERTER_PROFILE_CLIENT_SCRIPTS is enabled, the converters are
+    profiled before bundling. Over-budget converters are rejected with a 422
+    in "reject" mode; otherwise warnings are returned in the
+    X-Converter-Warnings header.
     """
     try:
         # Check if the Apigee templates exist
@@ -237,42 +329,32 @@ def merge_apiproxy():
         target_api_key = data.get('targetApiKey')
         request_converter = data.get('request_converter', '')
         response_converter = data.get('response_converter', '')
+        try:
+            budget_ms, budget_mode = _budget_settings(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Profile the converters against the latency budget. They come from
+        # the client, so this needs an explicit opt-in.
+        warnings = []
+        if budget_mode != "off" and config.CONVERTER_PROFILE_CLIENT_SCRIPTS:
+            reports, violations, warnings = _profile_converters(
+                request_converter, response_converter, budget_ms,
+                data.get('source_spec'), data.get('target_spec')
+            )
+            if violations and budget_mode == "reject":
+                return jsonify({
+                    "error": "Converter latency budget exceeded",
+                    "violations": violations,
+                    "warnings": warnings,
+                    "profile": reports
+                }), 422
+            warnings = violations + warnings
         
         # Create a temporary directory for the merged template
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Create the directory structure for the Apigee emulator format
-            apiproxy_dir = os.path.join(temp_dir, "apiproxy")
-            apiproxies_dir = os.path.join(apiproxy_dir, "apiproxies")
-            merged_apiproxy_dir = os.path.join(apiproxies_dir, "merged-apiproxy")
-            policies_dir = os.path.join(merged_apiproxy_dir, "policies")
-            proxies_dir = os.path.join(merged_apiproxy_dir, "proxies")
-            resources_dir = os.path.join(merged_apiproxy_dir, "resources")
-            targets_dir = os.path.join(merged_apiproxy_dir, "targets")
-            
-            # Create the environments directory structure
-            environments_dir = os.path.join(apiproxy_dir, "environments")
-            local_dir = os.path.join(environments_dir, "local")
-            
-            # Create all directories
-            for directory in [apiproxy_dir, apiproxies_dir, merged_apiproxy_dir, 
-                             policies_dir, proxies_dir, resources_dir, targets_dir,
-                             environments_dir, local_dir]:
-                os.makedirs(directory, exist_ok=True)
-            
-            # Copy and merge policies from both templates
-            _copy_and_merge_policies(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, policies_dir)
-            
-            # Copy and merge proxies from both templates
-            _copy_and_merge_proxies(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, proxies_dir, route)
-            
-            # Copy and merge targets from both templates
-            _copy_and_merge_targets(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, targets_dir, target_base_url, target_api_key)
-            
-            # Create the merged API proxy XML file
-            _create_merged_apiproxy_xml(merged_apiproxy_dir, route)
-            
-            # Create the deployments.json file
-            _create_deployments_json(local_dir, route)
+            # Lay out the templates that do not depend on the converters
+            apiproxy_dir, resources_dir = _scaffold_bundle(temp_dir, route, target_base_url, target_api_key)
             
             # Add request and response converter scripts as resources
             _add_converter_scripts(resources_dir, request_converter, response_converter)
@@ -282,17 +364,372 @@ def merge_apiproxy():
             _create_zip_file(apiproxy_dir, zip_path)
             
             # Return the zip file
-            return send_file(
+            response = send_file(
                 zip_path,
                 as_attachment=True,
                 download_name="merged-apiproxy.zip",
                 mimetype="application/zip"
             )
+            if warnings:
+                response.headers['X-Converter-Warnings'] = json.dumps(warnings)
+            return response
     
     except Exception as e:
         logger.error(f"Error merging API proxy templates: {str(e)}")
         return jsonify({"error": f"Error merging API proxy templates: {str(e)}"}), 500
 
+@app.route('/pipeline', methods=['POST'])
+def run_pipeline():
+    """
+    Endpoint to go from two swagger specifications to an API proxy bundle in one call.
+    
+    Runs the transform, extract, validate, profile and bundle stages
+    server-side. The bundle scaffolding is built from the templates while the
+    model call is still in flight. Progress is streamed as newline-delimited
+    JSON events; the final bundle event carries a download URL for the zip.
+    
+    Expected request body:
+    {
+        "input": {"input_file": "source swagger"},
+        "output": {"output_file": "target swagger"},
+        "route": "/example",
+        "authType": "apiKey",
+        "apiKey": "abc",
+        "targetBaseUrl": "wiremockEndpointUrl",
+        "targetAuthType": "apiKey",
+        "targetApiKey": "abc",
+        "latencyBudgetMs": 25,
+        "latencyBudgetMode": "warn"
+    }
+    """
+    if not check_apigee_templates():
+        return jsonify({"error": "Apigee templates not found. Please ensure the templates are properly mounted in the container."}), 500
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    
+    # Validate required parameters
+    required_params = ['input', 'output', 'route', 'authType', 'apiKey', 'targetBaseUrl', 'targetAuthType', 'targetApiKey']
+    for param in required_params:
+        if param not in data:
+            return jsonify({"error": f"Missing parameter: {param}"}), 400
+    for param in ('input', 'output'):
+        if not isinstance(data[param], dict):
+            return jsonify({"error": f"Invalid parameter: {param} must be an object"}), 400
+    
+    try:
+        budget_ms, budget_mode = _budget_settings(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    events = _run_pipeline(
+        data['input'].get('input_file'),
+        data['output'].get('output_file'),
+        data.get('route'),
+        data.get('targetBaseUrl'),
+        data.get('targetApiKey'),
+        budget_ms,
+        budget_mode
+    )
+    return Response(events, mimetype="application/x-ndjson")
+
+@app.route('/pipeline/bundles/<bundle_id>', methods=['GET'])
+def get_pipeline_bundle(bundle_id):
+    """Download a bundle built by /pipeline."""
+    zip_path = _bundle_path(bundle_id)
+    if zip_path is None or _bundle_expired(zip_path):
+        return jsonify({
+            "status": "ERROR",
+            "message": f"Bundle not found: {bundle_id}"
+        }), 404
+    
+    return send_file(
+        zip_path,
+        as_attachment=True,
+        download_name="merged-apiproxy.zip",
+        mimetype="application/zip"
+    )
+
+def _run_pipeline(non_camara_file, camara_file, route, target_base_url, target_api_key,
+                  budget_ms, budget_mode):
+    """Run the pipeline stages, yielding one JSON progress line per stage transition."""
+    started_at = time.perf_counter()
+    
+    def event(stage, status, at=None, **fields):
+        elapsed = (at if at is not None else time.perf_counter()) - started_at
+        fields.update(stage=stage, status=status, elapsed_ms=round(elapsed * 1000))
+        return json.dumps(fields) + "\n"
+    
+    def scaffold():
+        result = _scaffold_bundle(temp_dir, route, target_base_url, target_api_key)
+        return result, time.perf_counter()
+    
+    temp_dir = tempfile.mkdtemp(prefix="pipeline-")
+    scaffold_future = _scaffold_executor.submit(scaffold)
+    try:
+        yield event("scaffold", "started")
+        
+        # Transform: ask the model for the converter scripts
+        yield event("transform", "started")
+        try:
+            raw_content = _generate_converters(non_camara_file, camara_file)
+        except Exception as e:
+            logger.error(f"Error calling external API: {str(e)}")
+            yield event("transform", "failed", error=str(e))
+            return
+        logger.info(f"Raw API response: {raw_content}")
+        yield event("transform", "completed")
+        
+        # Extract: pull the JSON document out of the model reply
+        yield event("extract", "started")
+        try:
+            converters = json.loads(extract_json_content(raw_content))
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parsing error: {str(e)}")
+            yield event("extract", "failed", error=f"JSON parsing error: {str(e)}")
+            return
+        yield event("extract", "completed")
+        
+        # Validate: make sure both converters are usable and keep the
+        # JavaScript they compile to, which is what gets profiled and bundled
+        yield event("validate", "started")
+        scripts, errors = _validate_converters(converters)
+        if errors:
+            yield event("validate", "failed", errors=errors)
+            return
+        yield event("validate", "completed")
+        
+        # Profile: check the converters against the latency budget
+        if budget_mode != "off":
+            yield event("profile", "started")
+            reports, violations, warnings = _profile_converters(
+                scripts['request_converter'], scripts['response_converter'],
+                budget_ms, non_camara_file, camara_file, compiled=True
+            )
+            if violations and budget_mode == "reject":
+                yield event("profile", "failed", errors=violations, warnings=warnings, profile=reports)
+                return
+            yield event("profile", "completed", warnings=violations + warnings, profile=reports)
+        
+        # The scaffolding has normally finished while the model was running
+        try:
+            (apiproxy_dir, resources_dir), finished_at = scaffold_future.result()
+        except Exception as e:
+            logger.error(f"Error merging API proxy templates: {str(e)}")
+            yield event("scaffold", "failed", error=str(e))
+            return
+        yield event("scaffold", "completed", at=finished_at)
+        
+        # Bundle: drop in the converters and zip the result
+        yield event("bundle", "started")
+        try:
+            _add_converter_scripts(resources_dir, scripts['request_converter'], scripts['response_converter'])
+            bundle_id = _register_bundle(apiproxy_dir)
+        except Exception as e:
+            logger.error(f"Error building API proxy bundle: {str(e)}")
+            yield event("bundle", "failed", error=str(e))
+            return
+        yield event("bundle", "completed", bundle_id=bundle_id,
+                    download_url=f"/pipeline/bundles/{bundle_id}")
+    finally:
+        wait([scaffold_future])
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def _budget_settings(data):
+    """
+    Read the latency budget and mode for a request.
+    
+    A request can change the budget and switch between modes, but cannot
+    turn profiling on when the server has CONVERTER_BUDGET_MODE set to "off".
+    
+    Returns:
+        tuple: (budget_ms, budget_mode)
+    
+    Raises:
+        ValueError: If latencyBudgetMs or latencyBudgetMode is invalid.
+    """
+    budget_ms = data.get('latencyBudgetMs', config.CONVERTER_LATENCY_BUDGET_MS)
+    if isinstance(budget_ms, bool) or not isinstance(budget_ms, (int, float)) or budget_ms < 0:
+        raise ValueError(f"Invalid latencyBudgetMs: {budget_ms}")
+    
+    budget_mode = data.get('latencyBudgetMode', config.CONVERTER_BUDGET_MODE)
+    if budget_mode not in BUDGET_MODES:
+        raise ValueError(f"Invalid latencyBudgetMode: {budget_mode}")
+    if config.CONVERTER_BUDGET_MODE == "off":
+        budget_mode = "off"
+    return float(budget_ms), budget_mode
+
+def _profile_converters(request_converter, response_converter, budget_ms,
+                        source_spec=None, target_spec=None, compiled=False):
+    """
+    Profile the converters and check them against the latency budget.
+    
+    The request converter is fed payloads built from the source request
+    schema and the response converter payloads built from the target
+    response schema, when the specs provide them. Pass compiled=True when
+    the converters are already the output of compile_script().
+    
+    Returns:
+        tuple: (reports, violations, warnings) where reports maps converter
+            name to its profiling report.
+    """
+    profiler = converter_profiler.ConverterProfiler(
+        sizes=config.CONVERTER_PROFILE_SIZES,
+        timeout=config.CONVERTER_PROFILE_TIMEOUT
+    )
+    source = converter_profiler.load_spec(source_spec)
+    target = converter_profiler.load_spec(target_spec)
+    jobs = {
+        'request_converter': (request_converter, converter_profiler.find_request_schema(source), source, 'request'),
+        'response_converter': (response_converter, converter_profiler.find_response_schema(target), target, 'response')
+    }
+    
+    # Each run is a separate Node.js process, so profile both at once
+    futures = {
+        name: _background_executor.submit(profiler.profile, script, schema, spec, role, compiled)
+        for name, (script, schema, spec, role) in jobs.items()
+        if script
+    }
+    
+    reports = {}
+    violations = []
+    warnings = []
+    for name, future in futures.items():
+        reports[name] = future.result()
+        converter_violations, converter_warnings = converter_profiler.evaluate_budget(
+            name, reports[name], budget_ms
+        )
+        violations.extend(converter_violations)
+        warnings.extend(converter_warnings)
+    
+    for message in violations + warnings:
+        logger.warning(f"Converter profiling: {message}")
+    return reports, violations, warnings
+
+def _validate_converters(converters):
+    """
+    Check the converters extracted from the model reply.
+    
+    Both converters must be non-empty strings that parse as JavaScript, or
+    as TypeScript when the TypeScript compiler is installed.
+    
+    Returns:
+        tuple: (scripts, errors) where scripts maps each converter field to
+            the JavaScript it compiles to and errors lists the problems found.
+    """
+    if not isinstance(converters, dict):
+        return {}, ["Model response is not a JSON object"]
+    
+    errors = []
+    scripts = {}
+    for field in ('request_converter', 'response_converter'):
+        value = converters.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"Missing or empty {field}")
+        else:
+            scripts[field] = value
+    
+    # Each check is a separate Node.js process, so run them at once
+    futures = {field: _background_executor.submit(compile_script, script) for field, script in scripts.items()}
+    for field, future in futures.items():
+        result = future.result()
+        if result["error"]:
+            errors.append(f"Syntax error in {field}: {result['error']}")
+        scripts[field] = result["code"]
+    return scripts, errors
+
+def _bundle_path(bundle_id):
+    """Return the zip path for a bundle id, or None if the id is malformed."""
+    if not re.fullmatch(r"[0-9a-f]{32}", bundle_id):
+        return None
+    return os.path.join(config.PIPELINE_BUNDLE_DIR, f"{bundle_id}.zip")
+
+def _bundle_expired(zip_path):
+    """Check whether a bundle is missing or older than PIPELINE_BUNDLE_TTL."""
+    try:
+        return os.path.getmtime(zip_path) < time.time() - config.PIPELINE_BUNDLE_TTL
+    except OSError:
+        return True
+
+def _register_bundle(apiproxy_dir):
+    """
+    Zip a built bundle into the shared bundle directory and return its id.
+    
+    Bundles live on disk rather than in memory so that any worker can serve
+    the download.
+    """
+    _purge_expired_bundles()
+    os.makedirs(config.PIPELINE_BUNDLE_DIR, exist_ok=True)
+    bundle_id = uuid.uuid4().hex
+    zip_path = _bundle_path(bundle_id)
+    
+    # Write under a temporary name so a download never sees a partial zip
+    partial_path = f"{zip_path}.partial"
+    try:
+        _create_zip_file(apiproxy_dir, partial_path)
+        os.replace(partial_path, zip_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return bundle_id
+
+def _purge_expired_bundles():
+    """Delete bundles older than PIPELINE_BUNDLE_TTL."""
+    if not os.path.isdir(config.PIPELINE_BUNDLE_DIR):
+        return
+    for file in os.listdir(config.PIPELINE_BUNDLE_DIR):
+        zip_path = os.path.join(config.PIPELINE_BUNDLE_DIR, file)
+        if file.endswith('.zip') and _bundle_expired(zip_path):
+            try:
+                os.remove(zip_path)
+            except OSError:
+                pass
+
+def _scaffold_bundle(temp_dir, route, target_base_url, target_api_key):
+    """
+    Build the merged API proxy layout in temp_dir, everything except the converters.
+    
+    Returns:
+        tuple: The apiproxy directory to zip and the resources directory
+            that the converter scripts go into.
+    """
+    # Create the directory structure for the Apigee emulator format
+    apiproxy_dir = os.path.join(temp_dir, "apiproxy")
+    apiproxies_dir = os.path.join(apiproxy_dir, "apiproxies")
+    merged_apiproxy_dir = os.path.join(apiproxies_dir, "merged-apiproxy")
+    policies_dir = os.path.join(merged_apiproxy_dir, "policies")
+    proxies_dir = os.path.join(merged_apiproxy_dir, "proxies")
+    resources_dir = os.path.join(merged_apiproxy_dir, "resources")
+    targets_dir = os.path.join(merged_apiproxy_dir, "targets")
+    
+    # Create the environments directory structure
+    environments_dir = os.path.join(apiproxy_dir, "environments")
+    local_dir = os.path.join(environments_dir, "local")
+    
+    # Create all directories
+    for directory in [apiproxy_dir, apiproxies_dir, merged_apiproxy_dir, 
+                     policies_dir, proxies_dir, resources_dir, targets_dir,
+                     environments_dir, local_dir]:
+        os.makedirs(directory, exist_ok=True)
+    
+    # Copy and merge policies from both templates
+    _copy_and_merge_policies(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, policies_dir)
+    
+    # Copy and merge proxies from both templates
+    _copy_and_merge_proxies(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, proxies_dir, route)
+    
+    # Copy and merge targets from both templates
+    _copy_and_merge_targets(NORTHBOUND_TEMPLATE_PATH, SOUTHBOUND_TEMPLATE_PATH, targets_dir, target_base_url, target_api_key)
+    
+    # Create the merged API proxy XML file
+    _create_merged_apiproxy_xml(merged_apiproxy_dir, route)
+    
+    # Create the deployments.json file
+    _create_deployments_json(local_dir, route)
+    
+    return apiproxy_dir, resources_dir
+
 def _copy_and_merge_policies(northbound_path, southbound_path, target_dir):
     """Copy and merge policies from both templates."""
     # Copy policies from northbound template
@@ -300,20 +737,16 @@ def _copy_and_merge_policies(northbound_path, southbound_path, target_dir):
     if os.path.exists(northbound_policies_dir):
         for file in os.listdir(northbound_policies_dir):
             if file.endswith('.xml') or file.endswith('.js'):
-                shutil.copy(
-                    os.path.join(northbound_policies_dir, file),
-                    os.path.join(target_dir, file)
-                )
+                with open(os.path.join(target_dir, file), 'w') as f:
+                    f.write(_read_template(os.path.join(northbound_policies_dir, file)))
     
     # Copy policies from southbound template
     southbound_policies_dir = os.path.join(southbound_path, "apiproxy", "policies")
     if os.path.exists(southbound_policies_dir):
         for file in os.listdir(southbound_policies_dir):
             if file.endswith('.xml') or file.endswith('.js'):
-                shutil.copy(
-                    os.path.join(southbound_policies_dir, file),
-                    os.path.join(target_dir, file)
-                )
+                with open(os.path.join(target_dir, file), 'w') as f:
+                    f.write(_read_template(os.path.join(southbound_policies_dir, file)))
 
 def _copy_and_merge_proxies(northbound_path, southbound_path, target_dir, route):
     """Copy and merge proxies from both templates."""
@@ -322,8 +755,7 @@ def _copy_and_merge_proxies(northbound_path, southbound_path, target_dir, route)
     if os.path.exists(northbound_proxies_dir):
         for file in os.listdir(northbound_proxies_dir):
             if file.endswith('.xml'):
-                with open(os.path.join(northbound_proxies_dir, file), 'r') as f:
-                    content = f.read()
+                content = _read_template(os.path.join(northbound_proxies_dir, file))
                 
                 # Replace variables
                 content = content.replace("{proxy.basepath}", route)
@@ -336,8 +768,7 @@ def _copy_and_merge_proxies(northbound_path, southbound_path, target_dir, route)
     if os.path.exists(southbound_proxies_dir):
         for file in os.listdir(southbound_proxies_dir):
             if file.endswith('.xml'):
-                with open(os.path.join(southbound_proxies_dir, file), 'r') as f:
-                    content = f.read()
+                content = _read_template(os.path.join(southbound_proxies_dir, file))
                 
                 # Replace variables
                 content = content.replace("{proxy.basepath}", route)
@@ -352,8 +783,7 @@ def _copy_and_merge_targets(northbound_path, southbound_path, target_dir, target
     if os.path.exists(northbound_targets_dir):
         for file in os.listdir(northbound_targets_dir):
             if file.endswith('.xml'):
-                with open(os.path.join(northbound_targets_dir, file), 'r') as f:
-                    content = f.read()
+                content = _read_template(os.path.join(northbound_targets_dir, file))
                 
                 # Replace variables
                 content = content.replace("{target.url}", target_base_url)
@@ -366,8 +796,7 @@ def _copy_and_merge_targets(northbound_path, southbound_path, target_dir, target
     if os.path.exists(southbound_targets_dir):
         for file in os.listdir(southbound_targets_dir):
             if file.endswith('.xml'):
-                with open(os.path.join(southbound_targets_dir, file), 'r') as f:
-                    content = f.read()
+                content = _read_template(os.path.join(southbound_targets_dir, file))
                 
                 # Replace variables
                 content = content.replace("{target.url}", target_base_url)
@@ -380,8 +809,7 @@ def _create_merged_apiproxy_xml(target_dir, route):
     """Create the merged API proxy XML file."""
     # Read the northbound API proxy XML file
     northbound_xml_path = os.path.join(NORTHBOUND_TEMPLATE_PATH, "northbound-api-key.xml")
-    with open(northbound_xml_path, 'r') as f:
-        content = f.read()
+    content = _read_template(northbound_xml_path)
     
     # Replace variables
     content = content.replace("northbound-api-key", "merged-apiproxy")
@@ -436,6 +864,7 @@ def _create_zip_file(source_dir, zip_path):
 
 def create_app():
     """Factory function to create the Flask application."""
+    configure_logging()
     return app
 
 if __name__ == '__main__':
@@ -2,6 +2,7 @@
 Configuration module for the API Marketplace Adapter.
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -9,14 +10,46 @@ load_dotenv()
 
 # API Configuration
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
-if not ANTHROPIC_API_KEY:
-    raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+
+
+def get_anthropic_api_key():
+    """
+    Return the Anthropic API key, raising if it is not configured.
+
+    The check is deferred until the key is actually needed so that processes
+    which never call the model (health checks, /scripts, /merge-apiproxy)
+    can start without it.
+    """
+    api_key = os.environ.get("ANTHROPIC_API_KEY", ANTHROPIC_API_KEY)
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+    return api_key
 
 # Server Configuration
 HOST = os.environ.get("HOST", "0.0.0.0")
 PORT = int(os.environ.get("PORT", 5555))
 DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 
+# Pipeline Configuration
+# Seconds a bundle built by /pipeline stays available for download
+PIPELINE_BUNDLE_TTL = int(os.environ.get("PIPELINE_BUNDLE_TTL", 3600))
+# Directory bundles are written to; shared by every worker on the host
+PIPELINE_BUNDLE_DIR = os.environ.get("PIPELINE_BUNDLE_DIR", os.path.join(tempfile.gettempdir(), "pipeline-bundles"))
+
+# Converter Profiling Configuration
+# Allowed median latency per converter call, in milliseconds
+CONVERTER_LATENCY_BUDGET_MS = float(os.environ.get("CONVERTER_LATENCY_BUDGET_MS", 25))
+# What to do with converters over budget: "warn", "reject" or "off".
+# Profiling executes converter code, so it is off unless enabled here.
+CONVERTER_BUDGET_MODE = os.environ.get("CONVERTER_BUDGET_MODE", "off").lower()
+# Also profile converters sent by clients to /merge-apiproxy, rather than
+# only the ones /pipeline gets from the model. Trusted deployments only.
+CONVERTER_PROFILE_CLIENT_SCRIPTS = os.environ.get("CONVERTER_PROFILE_CLIENT_SCRIPTS", "False").lower() == "true"
+# Payload sizes to profile, as the length of the outermost arrays
+CONVERTER_PROFILE_SIZES = [int(size) for size in os.environ.get("CONVERTER_PROFILE_SIZES", "10,100,1000").split(",")]
+# Seconds before a converter profiling run is abandoned
+CONVERTER_PROFILE_TIMEOUT = int(os.environ.get("CONVERTER_PROFILE_TIMEOUT", 30))
+
 # Logging Configuration
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
-LOG_FILE = os.environ.get("LOG_FILE", "app.log") 
\ No newline at end of file
+LOG_FILE = os.environ.get("LOG_FILE", "app.log")
@@ -0,0 +1,305 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from api_marketplace_adapter import app as app_module
+from api_marketplace_adapter import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestColdStart(unittest.TestCase):
+    def run_snippet(self, snippet):
+        # Run in a fresh interpreter so module import side effects are visible
+        env = {k: v for k, v in os.environ.items() if k != 'ANTHROPIC_API_KEY'}
+        env['LOG_FILE'] = os.devnull
+        return subprocess.run(
+            [sys.executable, '-c', snippet],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+    
+    def test_import_does_not_load_anthropic(self):
+        result = self.run_snippet(
+            "import sys\n"
+            "import api_marketplace_adapter.app\n"
+            "print('anthropic' in sys.modules)\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'False')
+    
+    def test_health_without_api_key(self):
+        result = self.run_snippet(
+            "from api_marketplace_adapter.app import app\n"
+            "print(app.test_client().get('/health').status_code)\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '200')
+    
+    def test_warmup_loads_templates(self):
+        result = self.run_snippet(
+            "from api_marketplace_adapter import app\n"
+            "print(app.warmup(), app._read_template_cached.cache_info().currsize > 0)\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], 'True True')
+    
+    def test_missing_api_key_raises_on_first_use(self):
+        result = self.run_snippet(
+            "from api_marketplace_adapter import config\n"
+            "config.ANTHROPIC_API_KEY = None\n"
+            "try:\n"
+            "    config.get_anthropic_api_key()\n"
+            "except ValueError:\n"
+            "    print('raised')\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'raised')
+    
+    def test_transform_without_api_key_returns_json(self):
+        result = self.run_snippet(
+            "from api_marketplace_adapter import app, config\n"
+            "config.ANTHROPIC_API_KEY = None\n"
+            "response = app.app.test_client().post('/transform', json={'input': {}, 'output': {}})\n"
+            "print(response.status_code, 'error' in response.get_json())\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '500 True')
+
+class TestTemplateCache(unittest.TestCase):
+    def test_edited_template_is_reread(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'template.xml')
+            with open(path, 'w') as f:
+                f.write('<old/>')
+            self.assertEqual(app_module._read_template(path), '<old/>')
+            
+            with open(path, 'w') as f:
+                f.write('<new/>')
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+            self.assertEqual(app_module._read_template(path), '<new/>')
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.payload = {
+            "input": {"input_file": "source swagger"},
+            "output": {"output_file": "target swagger"},
+            "route": "/example",
+            "authType": "apiKey",
+            "apiKey": "abc",
+            "targetBaseUrl": "http://wiremock:8080",
+            "targetAuthType": "apiKey",
+            "targetApiKey": "xyz"
+        }
+        self.bundle_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(config, 'PIPELINE_BUNDLE_DIR', self.bundle_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.bundle_dir.cleanup)
+    
+    def run_pipeline(self, model_reply):
+        with mock.patch.object(app_module, '_generate_converters', return_value=model_reply):
+            response = self.client.post('/pipeline', json=self.payload)
+            body = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in body.splitlines()]
+    
+    def test_pipeline_builds_bundle(self):
+        reply = '```json\n' + json.dumps({
+            "request_converter": "// request",
+            "response_converter": "// response"
+        }) + '\n```'
+        events = self.run_pipeline(reply)
+        
+        completed = [e['stage'] for e in events if e['status'] == 'completed']
+        # Profiling is off unless the server enables it
+        self.assertEqual(completed, ['transform', 'extract', 'validate', 'scaffold', 'bundle'])
+        
+        response = self.client.get(events[-1]['download_url'])
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(response.data)) as bundle:
+            names = bundle.namelist()
+            self.assertIn('apiproxies/merged-apiproxy/resources/request-converter.js', names)
+            self.assertIn('apiproxies/merged-apiproxy/proxies/northbound-api-key.xml', names)
+        response.close()
+        
+        # The bundle is on disk where any worker can find it
+        bundle_path = os.path.join(self.bundle_dir.name, f"{events[-1]['bundle_id']}.zip")
+        self.assertTrue(os.path.exists(bundle_path))
+    
+    def test_pipeline_bundles_compiled_converters(self):
+        reply = '```json\n' + json.dumps({
+            "request_converter": "function convert(body: string): string { return body; }",
+            "response_converter": "function convert(body: string): string { return body; }"
+        }) + '\n```'
+        compiled = {"code": "function convert(body) { return body; }", "error": None, "checked": True}
+        with mock.patch.object(app_module, 'compile_script', return_value=compiled):
+            events = self.run_pipeline(reply)
+        self.assertEqual(events[-1]['status'], 'completed')
+        
+        response = self.client.get(events[-1]['download_url'])
+        with zipfile.ZipFile(io.BytesIO(response.data)) as bundle:
+            script = bundle.read('apiproxies/merged-apiproxy/resources/request-converter.js').decode()
+        response.close()
+        self.assertIn('function convert(body)', script)
+        self.assertNotIn(': string', script)
+    
+    def test_expired_bundle_is_not_served(self):
+        bundle_id = 'a' * 32
+        bundle_path = os.path.join(self.bundle_dir.name, f'{bundle_id}.zip')
+        with open(bundle_path, 'wb') as f:
+            f.write(b'zip')
+        expired = os.path.getmtime(bundle_path) - config.PIPELINE_BUNDLE_TTL - 1
+        os.utime(bundle_path, (expired, expired))
+        
+        response = self.client.get(f'/pipeline/bundles/{bundle_id}')
+        self.assertEqual(response.status_code, 404)
+        
+        app_module._purge_expired_bundles()
+        self.assertFalse(os.path.exists(bundle_path))
+    
+    def test_pipeline_reports_bundle_failure(self):
+        reply = '```json\n' + json.dumps({
+            "request_converter": "// request",
+            "response_converter": "// response"
+        }) + '\n```'
+        with mock.patch.object(app_module, '_create_zip_file', side_effect=OSError('disk full')):
+            events = self.run_pipeline(reply)
+        self.assertEqual(events[-1]['stage'], 'bundle')
+        self.assertEqual(events[-1]['status'], 'failed')
+        self.assertEqual(events[-1]['error'], 'disk full')
+    
+    @unittest.skipIf(shutil.which('node') is None, 'Node.js is not installed')
+    def test_pipeline_rejects_syntax_error(self):
+        reply = '```json\n' + json.dumps({
+            "request_converter": "function convert(request) { return request",
+            "response_converter": "// response"
+        }) + '\n```'
+        events = self.run_pipeline(reply)
+        self.assertEqual(events[-1]['stage'], 'validate')
+        self.assertEqual(events[-1]['status'], 'failed')
+        self.assertEqual(len(events[-1]['errors']), 1)
+        self.assertIn('request_converter', events[-1]['errors'][0])
+    
+    def test_pipeline_stops_on_invalid_converters(self):
+        events = self.run_pipeline('```json\n{"request_converter": ""}\n```')
+        self.assertEqual(events[-1]['stage'], 'validate')
+        self.assertEqual(events[-1]['status'], 'failed')
+        self.assertEqual(len(events[-1]['errors']), 2)
+    
+    def test_pipeline_reports_unparseable_reply(self):
+        events = self.run_pipeline('not json')
+        self.assertEqual(events[-1]['stage'], 'extract')
+        self.assertEqual(events[-1]['status'], 'failed')
+    
+    def test_pipeline_missing_parameter(self):
+        del self.payload['targetApiKey']
+        response = self.client.post('/pipeline', json=self.payload)
+        self.assertEqual(response.status_code, 400)
+    
+    @unittest.skipIf(shutil.which('node') is None, 'Node.js is not installed')
+    def test_pipeline_rejects_slow_converter(self):
+        self.payload['latencyBudgetMode'] = 'reject'
+        self.payload['latencyBudgetMs'] = 0
+        reply = '```json\n' + json.dumps({
+            "request_converter": "module.exports = function (r) { return r; };",
+            "response_converter": "module.exports = function (r) { return r; };"
+        }) + '\n```'
+        with mock.patch.object(config, 'CONVERTER_BUDGET_MODE', 'warn'):
+            events = self.run_pipeline(reply)
+        self.assertEqual(events[-1]['stage'], 'profile')
+        self.assertEqual(events[-1]['status'], 'failed')
+    
+    def test_pipeline_invalid_body(self):
+        response = self.client.post('/pipeline', data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+        
+        self.payload['input'] = 'source swagger'
+        response = self.client.post('/pipeline', json=self.payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('input', response.get_json()['error'])
+    
+    def test_pipeline_invalid_budget(self):
+        self.payload['latencyBudgetMs'] = 'fast'
+        response = self.client.post('/pipeline', json=self.payload)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_unknown_bundle(self):
+        response = self.client.get('/pipeline/bundles/missing')
+        self.assertEqual(response.status_code, 404)
+
+@unittest.skipIf(shutil.which('node') is None, 'Node.js is not installed')
+class TestMergeApiproxyBudget(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.payload = {
+            "route": "/example",
+            "authType": "apiKey",
+            "apiKey": "abc",
+            "targetBaseUrl": "http://wiremock:8080",
+            "targetAuthType": "apiKey",
+            "targetApiKey": "xyz",
+            "request_converter": "module.exports = function (r) { return r; };"
+        }
+        for name, value in (('CONVERTER_BUDGET_MODE', 'warn'), ('CONVERTER_PROFILE_CLIENT_SCRIPTS', True)):
+            patcher = mock.patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_reject_over_budget(self):
+        self.payload['latencyBudgetMode'] = 'reject'
+        self.payload['latencyBudgetMs'] = 0
+        response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 422)
+        body = response.get_json()
+        self.assertTrue(body['violations'])
+        self.assertEqual(body['profile']['request_converter']['status'], 'ok')
+    
+    def test_warn_over_budget(self):
+        self.payload['latencyBudgetMode'] = 'warn'
+        self.payload['latencyBudgetMs'] = 0
+        response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.headers['X-Converter-Warnings']))
+        response.close()
+    
+    def test_invalid_budget_mode(self):
+        self.payload['latencyBudgetMode'] = 'ignore'
+        response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_invalid_budget(self):
+        self.payload['latencyBudgetMs'] = 'fast'
+        response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_client_scripts_not_profiled_by_default(self):
+        self.payload['latencyBudgetMode'] = 'reject'
+        self.payload['latencyBudgetMs'] = 0
+        with mock.patch.object(config, 'CONVERTER_PROFILE_CLIENT_SCRIPTS', False):
+            response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Converter-Warnings', response.headers)
+        response.close()
+    
+    def test_client_cannot_enable_profiling(self):
+        self.payload['latencyBudgetMode'] = 'reject'
+        self.payload['latencyBudgetMs'] = 0
+        with mock.patch.object(config, 'CONVERTER_BUDGET_MODE', 'off'):
+            response = self.client.post('/merge-apiproxy', json=self.payload)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
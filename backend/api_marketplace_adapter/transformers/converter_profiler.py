@@ -0,0 +1,602 @@
+"""
+Converter profiler for API Marketplace Adapter.
+
+This module runs generated request/response converter scripts under Node.js
+against synthetic payloads of increasing size, and reports per-call latency,
+heap allocation and how the latency scales with the payload.
+
+Converters are untrusted code. Each run happens in a separate Node.js
+process under the Node permission model (no filesystem, child process or
+worker access), with an empty environment, resource limits, and, when the
+server runs as root, the `nobody` user. The permission model does not cover
+network access, so profiling stays opt-in (see config.CONVERTER_BUDGET_MODE).
+"""
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import signal
+import subprocess
+
+from api_marketplace_adapter.transformers.script_compiler import compile_script
+
+logger = logging.getLogger(__name__)
+
+# Node.js harness. Reads {source, role, candidates, payloads, minTimeMs,
+# maxIterations} from stdin and prints one JSON result. The converter runs
+# in a vm context with stubs for the Apigee `context`, `request`, `response`
+# and `message` objects, whose content is the payload as a JSON string. The
+# vm context is not a security boundary; isolation comes from how the
+# process is started (see _sandbox_options).
+_HARNESS = r"""
+const vm = require('vm');
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const role = input.role;
+
+// A fresh vm context with its own Apigee flow variables for the message
+// being converted. resetMessage() puts a payload back into the variables.
+function makeSandbox() {
+  let variables = {};
+  const variableName = (name) => name.replace(/^message\./, `${role}.`);
+  const apigeeMessage = (prefix) => ({
+    get content() { return variables[`${prefix}.content`]; },
+    set content(value) { variables[`${prefix}.content`] = value; },
+    headers: { 'content-type': 'application/json' },
+    queryParams: {}
+  });
+  const module = { exports: {} };
+  const sandbox = {
+    module,
+    exports: module.exports,
+    console: { log() {}, info() {}, warn() {}, error() {} },
+    print() {},
+    context: {
+      getVariable: (name) => variables[variableName(name)],
+      setVariable: (name, value) => { variables[variableName(name)] = value; },
+      removeVariable: (name) => { delete variables[variableName(name)]; },
+      proxyRequest: apigeeMessage('request'),
+      targetRequest: apigeeMessage('request'),
+      targetResponse: apigeeMessage('response'),
+      proxyResponse: apigeeMessage('response'),
+      flow: role === 'request' ? 'PROXY_REQ_FLOW' : 'TARGET_RESP_FLOW'
+    },
+    request: apigeeMessage('request'),
+    response: apigeeMessage('response'),
+    message: apigeeMessage(role)
+  };
+  vm.createContext(sandbox);
+  const resetMessage = (text) => {
+    variables = {
+      [`${role}.content`]: text,
+      [`${role}.header.content-type`]: 'application/json',
+      'request.verb': 'POST',
+      'response.status.code': 200
+    };
+  };
+  return { sandbox, resetMessage };
+}
+
+// Prefer functions named for this converter's role, then convert/transform
+const ownRole = role === 'request' ? /[Rr]equest|[Rr]eq(?![a-z])/ : /[Rr]esponse|[Rr]esp?(?![a-z])/;
+const otherRole = role === 'request' ? /[Rr]esponse|[Rr]esp?(?![a-z])/ : /[Rr]equest|[Rr]eq(?![a-z])/;
+function score(name) {
+  let value = 0;
+  if (ownRole.test(name)) value += 2;
+  else if (otherRole.test(name)) value -= 2;
+  if (/[Cc]onvert|[Tt]ransform/.test(name)) value += 1;
+  return value;
+}
+
+function loadEntryPoint(script, { sandbox, resetMessage }) {
+  resetMessage(input.payloads[0]);
+  const lookup = input.candidates.map(
+    (name) => `if (typeof ${name} === 'function') globalThis.__candidates.push([${JSON.stringify(name)}, ${name}]);`
+  ).join('\n');
+  sandbox.__candidates = [];
+  script.runInContext(sandbox, { timeout: 5000 });
+  vm.runInContext(lookup, sandbox);
+
+  const candidates = [];
+  const exported = sandbox.module.exports;
+  if (typeof exported === 'function') candidates.push([exported.name || 'module.exports', exported]);
+  for (const [name, value] of Object.entries(exported || {})) {
+    if (typeof value === 'function') candidates.push([name, value]);
+  }
+  candidates.push(...sandbox.__candidates);
+
+  let best = null;
+  for (const candidate of candidates) {
+    if (!best || score(candidate[0]) > score(best[0])) best = candidate;
+  }
+  return best;
+}
+
+function median(values) {
+  const sorted = [...values].sort((a, b) => a - b);
+  return sorted[Math.floor(sorted.length / 2)];
+}
+
+const output = { samples: [] };
+try {
+  const script = new vm.Script(input.source, { filename: 'converter.js' });
+  const loaded = makeSandbox();
+  const entry = loadEntryPoint(script, loaded);
+  // Functions get the parsed payload; top-level Apigee scripts are re-run
+  // on every call, each time in a new context so that top-level const and
+  // let declarations do not clash. Contexts are made before timing starts.
+  let prepare;
+  if (entry) {
+    output.entry_point = entry[0];
+    prepare = (text) => {
+      const payload = JSON.parse(text);
+      return () => { loaded.resetMessage(text); entry[1](payload); };
+    };
+  } else {
+    output.entry_point = 'script';
+    prepare = (text) => {
+      const fresh = makeSandbox();
+      fresh.resetMessage(text);
+      return () => script.runInContext(fresh.sandbox);
+    };
+  }
+
+  for (const text of input.payloads) {
+    for (let i = 0; i < 3; i++) prepare(text)();
+    let call = prepare(text);
+    let start = process.hrtime.bigint();
+    call();
+    const probeMs = Math.max(Number(process.hrtime.bigint() - start) / 1e6, 0.001);
+    const iterations = Math.max(5, Math.min(input.maxIterations, Math.floor(input.minTimeMs / probeMs)));
+    const calls = Array.from({ length: iterations }, () => prepare(text));
+    const durations = [];
+    for (call of calls) {
+      start = process.hrtime.bigint();
+      call();
+      durations.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+    call = prepare(text);
+    if (global.gc) global.gc();
+    const heapBefore = process.memoryUsage().heapUsed;
+    call();
+    const heapAfter = process.memoryUsage().heapUsed;
+    output.samples.push({
+      payload_bytes: text.length,
+      iterations,
+      median_ms: median(durations),
+      max_ms: Math.max(...durations),
+      heap_bytes: Math.max(0, heapAfter - heapBefore)
+    });
+  }
+} catch (e) {
+  output.error = String(e && e.message || e);
+}
+console.log(JSON.stringify(output));
+"""
+
+# Top-level function declarations the harness considers as entry points
+_FUNCTION_NAME_PATTERN = re.compile(
+    r"function\s+([A-Za-z_$][\w$]*)\s*\("
+    r"|(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"
+)
+
+# Below this per-call latency the timer resolution dominates and the
+# scaling exponent is not meaningful
+_NOISE_FLOOR_MS = 0.05
+
+# Schemas nested deeper than this are cut off (guards recursive $refs)
+_MAX_SCHEMA_DEPTH = 8
+
+# Used when the spec has no usable JSON schema for the converter input
+_GENERIC_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name": {"type": "string"},
+                    "value": {"type": "number"},
+                    "active": {"type": "boolean"},
+                    "tags": {"type": "array", "items": {"type": "string"}}
+                }
+            }
+        }
+    }
+}
+
+_STRING_FORMATS = {
+    "date": "2024-01-01",
+    "date-time": "2024-01-01T00:00:00Z",
+    "email": "user@example.com",
+    "uri": "https://example.com",
+    "uuid": "123e4567-e89b-12d3-a456-426614174000",
+    "ipv4": "192.0.2.1",
+    "ipv6": "2001:db8::1"
+}
+
+
+def load_spec(spec_text):
+    """
+    Parse a swagger specification given as JSON or YAML text.
+
+    Args:
+        spec_text (str): The specification.
+
+    Returns:
+        dict: The parsed specification, or None if it cannot be parsed.
+    """
+    if not spec_text:
+        return None
+    try:
+        return json.loads(spec_text)
+    except ValueError:
+        pass
+    try:
+        # PyYAML is only needed for YAML specs, so import it on demand
+        import yaml
+        spec = yaml.safe_load(spec_text)
+    except Exception as e:
+        logger.warning(f"Could not parse specification: {str(e)}")
+        return None
+    return spec if isinstance(spec, dict) else None
+
+
+def find_request_schema(spec):
+    """Return the first JSON request body schema in a parsed specification."""
+    for operation in _operations(spec):
+        content = (operation.get("requestBody") or {}).get("content") or {}
+        schema = _json_schema(content)
+        if schema:
+            return schema
+    return None
+
+
+def find_response_schema(spec):
+    """Return the first JSON schema of a 2xx response in a parsed specification."""
+    for operation in _operations(spec):
+        for status, response in (operation.get("responses") or {}).items():
+            if not str(status).startswith("2") or not isinstance(response, dict):
+                continue
+            schema = _json_schema(response.get("content") or {})
+            if schema:
+                return schema
+    return None
+
+
+def _operations(spec):
+    for path_item in ((spec or {}).get("paths") or {}).values():
+        if not isinstance(path_item, dict):
+            continue
+        for method, operation in path_item.items():
+            if method in ("get", "put", "post", "patch", "delete") and isinstance(operation, dict):
+                yield operation
+
+
+def _json_schema(content):
+    for media_type, media in content.items():
+        if "json" in media_type and isinstance(media, dict) and media.get("schema"):
+            return media["schema"]
+    return None
+
+
+def generate_payload(schema, size, spec=None):
+    """
+    Generate a synthetic payload that matches a JSON schema.
+
+    The outermost array on each branch gets `size` items so that the payload
+    grows with `size`; arrays nested inside it get two items to keep growth
+    linear. Scalar values vary with the array index so items are distinct.
+
+    Args:
+        schema (dict): OpenAPI schema, possibly containing $refs.
+        size (int): Number of items in the outermost arrays.
+        spec (dict, optional): Specification used to resolve $refs.
+
+    Returns:
+        The generated payload.
+    """
+    return _generate(schema or {}, size, spec or {}, depth=0, scaled=False, index=0)
+
+
+def _resolve(schema, spec):
+    ref = schema.get("$ref")
+    if not isinstance(ref, str) or not ref.startswith("#/"):
+        return schema
+    node = spec
+    for part in ref[2:].split("/"):
+        if not isinstance(node, dict) or part not in node:
+            return {}
+        node = node[part]
+    return node if isinstance(node, dict) else {}
+
+
+def _generate(schema, size, spec, depth, scaled, index):
+    if depth > _MAX_SCHEMA_DEPTH or not isinstance(schema, dict):
+        return None
+    schema = _resolve(schema, spec)
+
+    if "example" in schema and schema.get("type") not in ("object", "array"):
+        return schema["example"]
+    if schema.get("enum"):
+        return schema["enum"][index % len(schema["enum"])]
+
+    if schema.get("allOf"):
+        merged = {}
+        for part in schema["allOf"]:
+            value = _generate(part, size, spec, depth + 1, scaled, index)
+            if isinstance(value, dict):
+                merged.update(value)
+        return merged
+    for key in ("oneOf", "anyOf"):
+        if schema.get(key):
+            return _generate(schema[key][0], size, spec, depth + 1, scaled, index)
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), None)
+    if schema_type is None:
+        if "properties" in schema:
+            schema_type = "object"
+        elif "items" in schema:
+            schema_type = "array"
+
+    if schema_type == "object":
+        return {
+            name: _generate(prop, size, spec, depth + 1, scaled, index)
+            for name, prop in (schema.get("properties") or {}).items()
+        }
+    if schema_type == "array":
+        count = 2 if scaled else size
+        return [_generate(schema.get("items") or {}, size, spec, depth + 1, True, i) for i in range(count)]
+    if schema_type == "integer":
+        return int(schema.get("minimum", 1)) + index
+    if schema_type == "number":
+        return float(schema.get("minimum", 1.5)) + index
+    if schema_type == "boolean":
+        return True
+    if schema_type == "string":
+        return _STRING_FORMATS.get(schema.get("format"), f"string-{index}")
+    return None
+
+
+def _candidate_names(script):
+    names = []
+    for match in _FUNCTION_NAME_PATTERN.finditer(script):
+        name = match.group(1) or match.group(2)
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _node_major_version(node_path):
+    try:
+        result = subprocess.run([node_path, "--version"], capture_output=True, text=True, timeout=10)
+        return int(result.stdout.strip().lstrip("v").split(".")[0])
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def _scaling_exponent(samples):
+    """
+    Least-squares slope of log(latency) against log(payload size).
+
+    Samples below the noise floor are left out of the fit.
+    """
+    points = [
+        (math.log(s["payload_bytes"]), math.log(s["median_ms"]))
+        for s in samples
+        if s["payload_bytes"] > 0 and s["median_ms"] >= _NOISE_FLOOR_MS
+    ]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def _classify_scaling(exponent):
+    if exponent is None:
+        return "negligible"
+    if exponent < 0.5:
+        return "sublinear"
+    if exponent < 1.5:
+        return "linear"
+    return "superlinear"
+
+
+class ConverterProfiler:
+    """Profiles converter scripts with Node.js against synthetic payloads."""
+
+    def __init__(self, sizes=(10, 100, 1000), timeout=30, node_path=None,
+                 min_time_ms=50, max_iterations=200, memory_mb=256):
+        """
+        Initialize the converter profiler.
+
+        Args:
+            sizes (tuple): Payload sizes to profile, as outermost array lengths.
+            timeout (int): Seconds before a profiling run is abandoned.
+            node_path (str, optional): Node.js executable. Defaults to `node`
+                on the PATH.
+            min_time_ms (int): Time spent measuring each payload size.
+            max_iterations (int): Upper bound on calls per payload size.
+            memory_mb (int): V8 heap limit for the profiling process.
+        """
+        self.sizes = sorted(sizes)
+        self.timeout = timeout
+        self.node_path = node_path or shutil.which("node")
+        self.min_time_ms = min_time_ms
+        self.max_iterations = max_iterations
+        self.memory_mb = memory_mb
+
+    def _sandbox_command(self):
+        """Return the command line for a sandboxed run, or None if unsupported."""
+        major = _node_major_version(self.node_path)
+        if major is None or major < 20:
+            return None
+        # Resource limits are set by prlimit (util-linux), which then execs
+        # Node.js, so no Python code runs in the forked child
+        prlimit_path = shutil.which("prlimit")
+        if not prlimit_path:
+            return None
+        cpu_seconds = int(self.timeout) + 1
+        permission_flag = "--permission" if major >= 22 else "--experimental-permission"
+        return [
+            prlimit_path, f"--cpu={cpu_seconds}", "--fsize=0", "--core=0", "--nofile=64", "--",
+            self.node_path, permission_flag, "--no-warnings", "--expose-gc",
+            f"--max-old-space-size={self.memory_mb}", "-e", _HARNESS
+        ]
+
+    def _sandbox_options(self):
+        """Process options that isolate the profiling run from the server."""
+        options = {"env": {}, "cwd": "/"}
+        if os.geteuid() == 0:
+            try:
+                import pwd
+                nobody = pwd.getpwnam("nobody")
+                options.update(user=nobody.pw_uid, group=nobody.pw_gid, extra_groups=[])
+            except KeyError:
+                logger.warning("User nobody not found, converter profiling runs as root")
+        return options
+
+    def profile(self, script, schema=None, spec=None, role="request", compiled=False):
+        """
+        Profile one converter script.
+
+        TypeScript is transpiled first when the compiler is installed (see
+        script_compiler). The entry point is chosen among module.exports and
+        top-level functions, preferring names that match the converter role
+        and then names containing convert or transform; it is called with
+        the parsed payload. A script without functions is treated as an
+        Apigee JavaScript policy and re-run on every call, reading the
+        payload through the stubbed `context`/`request`/`response` objects.
+
+        Args:
+            script (str): JavaScript or TypeScript source of the converter.
+            schema (dict, optional): Schema of the converter input. A generic
+                list-of-records schema is used when omitted.
+            spec (dict, optional): Specification used to resolve $refs.
+            role (str): "request" or "response".
+            compiled (bool): The script is already the JavaScript returned by
+                compile_script() and is profiled as is.
+
+        Returns:
+            dict: Report with `status` ("ok", "error", "timeout" or
+                "skipped"), `samples` per size, `scaling_exponent` and
+                `scaling`.
+        """
+        report = {"status": "skipped", "samples": [], "scaling_exponent": None, "scaling": None}
+        if not self.node_path:
+            report["error"] = "Node.js is not available"
+            return report
+        command = self._sandbox_command()
+        if command is None:
+            report["error"] = "Node.js 20 or newer and prlimit are required for sandboxed profiling"
+            return report
+
+        source = script
+        if not compiled:
+            result = compile_script(script, node_path=self.node_path)
+            if result["error"]:
+                report["status"] = "error"
+                report["error"] = result["error"]
+                return report
+            source = result["code"]
+
+        payloads = [
+            json.dumps(generate_payload(schema or _GENERIC_SCHEMA, size, spec))
+            for size in self.sizes
+        ]
+        harness_input = json.dumps({
+            "source": source,
+            "role": role,
+            "candidates": _candidate_names(source),
+            "payloads": payloads,
+            "minTimeMs": self.min_time_ms,
+            "maxIterations": self.max_iterations
+        })
+
+        try:
+            result = subprocess.run(
+                command,
+                input=harness_input,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                **self._sandbox_options()
+            )
+        except subprocess.TimeoutExpired:
+            result = None
+        if result is None or result.returncode == -signal.SIGXCPU:
+            report["status"] = "timeout"
+            report["error"] = f"Profiling did not finish within {self.timeout} seconds"
+            return report
+
+        try:
+            output = json.loads(result.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            report["status"] = "error"
+            report["error"] = result.stderr.strip() or "Profiler produced no output"
+            return report
+
+        samples = output.get("samples", [])
+        for size, sample in zip(self.sizes, samples):
+            sample["size"] = size
+        report["entry_point"] = output.get("entry_point")
+        report["samples"] = samples
+        if output.get("error"):
+            report["status"] = "error"
+            report["error"] = output["error"]
+        else:
+            report["status"] = "ok"
+        if samples:
+            exponent = _scaling_exponent(samples)
+            report["scaling_exponent"] = round(exponent, 2) if exponent is not None else None
+            report["scaling"] = _classify_scaling(exponent)
+        return report
+
+
+def evaluate_budget(name, report, budget_ms):
+    """
+    Check a profiling report against a per-call latency budget.
+
+    Exceeding the budget at any profiled size, or not finishing at all, is a
+    violation. Superlinear scaling and converters that could not be profiled
+    only produce warnings, since synthetic payloads may not match what the
+    converter expects.
+
+    Args:
+        name (str): Converter name used in the messages.
+        report (dict): Report returned by ConverterProfiler.profile.
+        budget_ms (float): Allowed median latency per call in milliseconds.
+
+    Returns:
+        tuple: (violations, warnings), each a list of messages.
+    """
+    violations = []
+    warnings = []
+    if report["status"] == "timeout":
+        violations.append(f"{name}: {report['error']}")
+    elif report["status"] in ("error", "skipped"):
+        warnings.append(f"{name}: could not be profiled: {report['error']}")
+
+    for sample in report["samples"]:
+        if sample["median_ms"] > budget_ms:
+            violations.append(
+                f"{name}: {sample['median_ms']:.2f} ms per call at size {sample['size']} "
+                f"exceeds the {budget_ms:g} ms budget"
+            )
+            break
+
+    if report["scaling"] == "superlinear":
+        warnings.append(
+            f"{name}: latency grows superlinearly with payload size "
+            f"(exponent {report['scaling_exponent']})"
+        )
+    return violations, warnings
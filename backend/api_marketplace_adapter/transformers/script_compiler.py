@@ -0,0 +1,105 @@
+"""
+Script compiler for API Marketplace Adapter.
+
+This module syntax-checks converter scripts with Node.js. The model is asked
+for TypeScript, so when the TypeScript compiler is installed the script is
+transpiled to JavaScript first. The script is parsed but never executed.
+"""
+import json
+import logging
+import shutil
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Node.js compiler. Reads the script from stdin and prints
+# {code, typescript, error}. The typescript package is looked up through
+# the normal module paths and then in the global node_modules next to the
+# node executable.
+_COMPILER = r"""
+const path = require('path');
+const vm = require('vm');
+const source = require('fs').readFileSync(0, 'utf8');
+
+function loadTypeScript() {
+  const globalModule = path.resolve(process.execPath, '..', '..', 'lib', 'node_modules', 'typescript');
+  for (const request of ['typescript', globalModule]) {
+    try {
+      return require(request);
+    } catch (e) {}
+  }
+  return null;
+}
+
+const output = { code: source, typescript: false };
+const ts = loadTypeScript();
+if (ts) {
+  output.typescript = true;
+  const result = ts.transpileModule(source, {
+    reportDiagnostics: true,
+    compilerOptions: {
+      target: ts.ScriptTarget.ES2019,
+      module: ts.ModuleKind.CommonJS,
+      alwaysStrict: false
+    }
+  });
+  const errors = (result.diagnostics || []).filter((d) => d.category === ts.DiagnosticCategory.Error);
+  if (errors.length) {
+    output.error = errors.map((d) => {
+      const message = ts.flattenDiagnosticMessageText(d.messageText, '\n');
+      if (!d.file || d.start === undefined) return message;
+      const { line, character } = d.file.getLineAndCharacterOfPosition(d.start);
+      return `line ${line + 1}:${character + 1}: ${message}`;
+    }).join('; ');
+  }
+  output.code = result.outputText;
+}
+if (!output.error) {
+  try {
+    new vm.Script(output.code, { filename: 'converter.js' });
+  } catch (e) {
+    output.error = e.message;
+  }
+}
+console.log(JSON.stringify(output));
+"""
+
+
+def compile_script(script, timeout=10, node_path=None):
+    """
+    Syntax-check a converter script, transpiling TypeScript when possible.
+
+    Args:
+        script (str): Source of the converter.
+        timeout (int): Seconds before the check is abandoned.
+        node_path (str, optional): Node.js executable. Defaults to `node`
+            on the PATH.
+
+    Returns:
+        dict: `code` is the JavaScript to run, `error` the syntax error
+            message or None, and `checked` is False when Node.js is not
+            available and the script could not be checked.
+    """
+    node_path = node_path or shutil.which("node")
+    if not node_path:
+        logger.warning("Node.js is not available, converter syntax is not checked")
+        return {"code": script, "error": None, "checked": False}
+
+    try:
+        result = subprocess.run(
+            [node_path, "-e", _COMPILER],
+            input=script,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        output = json.loads(result.stdout.strip().splitlines()[-1])
+    except subprocess.TimeoutExpired:
+        return {"code": script, "error": f"Syntax check did not finish within {timeout} seconds", "checked": True}
+    except (IndexError, ValueError):
+        return {"code": script, "error": result.stderr.strip() or "Syntax check produced no output", "checked": True}
+
+    error = output.get("error")
+    if error and not output["typescript"]:
+        error += " (TypeScript is only accepted when the typescript npm package is installed)"
+    return {"code": output["code"], "error": error, "checked": True}
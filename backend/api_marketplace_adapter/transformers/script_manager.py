@@ -28,6 +28,11 @@ class ScriptManager:
         else:
             self.scripts_dir = Path(scripts_dir)
         
+        # Script names keyed on the directory's modification time, which
+        # changes whenever a script is added, removed or renamed.
+        self._index = None
+        self._index_mtime = None
+        
         logger.info(f"Script manager initialized with scripts directory: {self.scripts_dir}")
     
     def get_script_path(self, script_name):
@@ -92,7 +97,11 @@ class ScriptManager:
             list: List of script names.
         """
         try:
-            return [f.name for f in self.scripts_dir.glob('*.js')]
+            mtime = os.stat(self.scripts_dir).st_mtime_ns
+            if self._index is None or self._index_mtime != mtime:
+                self._index = [f.name for f in self.scripts_dir.glob('*.js')]
+                self._index_mtime = mtime
+            return list(self._index)
         except Exception as e:
             logger.error(f"Error listing scripts: {str(e)}")
             return [] 
\ No newline at end of file
@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import unittest
+from api_marketplace_adapter.transformers.converter_profiler import (
+    ConverterProfiler,
+    evaluate_budget,
+    find_request_schema,
+    find_response_schema,
+    generate_payload,
+    load_spec
+)
+from api_marketplace_adapter.transformers.script_compiler import compile_script
+
+SWAGGERS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'swaggers')
+
+LINEAR_CONVERTER = """
+function convertRequest(request) {
+    return { records: request.items.map(item => ({ key: item.id, label: item.name })) };
+}
+"""
+
+QUADRATIC_CONVERTER = """
+module.exports = function (request) {
+    const seen = [];
+    for (const item of request.items) {
+        if (!seen.some(other => other.id === item.id)) seen.push(item);
+    }
+    return seen;
+};
+"""
+
+# An Apigee JavaScript policy: top-level code that reads and rewrites the
+# message through the flow variables
+APIGEE_REQUEST_CONVERTER = """
+var body = JSON.parse(context.getVariable('request.content'));
+var converted = {
+    records: body.items.map(function (item) {
+        return { key: String(item.id), label: item.name, active: item.active };
+    })
+};
+context.setVariable('request.content', JSON.stringify(converted));
+context.setVariable('request.header.Content-Type', 'application/json');
+"""
+
+APIGEE_CONST_CONVERTER = """
+const body = JSON.parse(context.getVariable('request.content'));
+let records = body.items.map((item) => ({ key: String(item.id), label: item.name }));
+context.setVariable('request.content', JSON.stringify({ records }));
+"""
+
+APIGEE_RESPONSE_CONVERTER = """
+function convertResponse() {
+    var body = JSON.parse(response.content);
+    response.content = JSON.stringify({ data: body.items, count: body.items.length });
+}
+convertResponse();
+"""
+
+TYPESCRIPT_CONVERTER = """
+interface Item { id: number; name: string; }
+export function convertRequest(request: { items: Item[] }): { keys: number[] } {
+    return { keys: request.items.map((item: Item) => item.id) };
+}
+"""
+
+def typescript_available():
+    if shutil.which('node') is None:
+        return False
+    return compile_script('let value: number = 1;')['error'] is None
+
+class TestPayloadGeneration(unittest.TestCase):
+    def test_outer_array_scales_with_size(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "items": {"type": "array", "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "tags": {"type": "array", "items": {"type": "string"}}
+                    }
+                }}
+            }
+        }
+        payload = generate_payload(schema, 50)
+        self.assertEqual(len(payload["items"]), 50)
+        self.assertEqual(len(payload["items"][0]["tags"]), 2)
+        self.assertEqual(len({item["id"] for item in payload["items"]}), 50)
+    
+    def test_refs_and_enums(self):
+        spec = {"components": {"schemas": {
+            "Status": {"type": "string", "enum": ["ACTIVE", "INACTIVE"]}
+        }}}
+        schema = {"type": "object", "properties": {"status": {"$ref": "#/components/schemas/Status"}}}
+        self.assertEqual(generate_payload(schema, 1, spec), {"status": "ACTIVE"})
+    
+    def test_schemas_from_swagger(self):
+        with open(os.path.join(SWAGGERS_DIR, 'camara.device-roaming-status.yml')) as f:
+            spec = load_spec(f.read())
+        self.assertIsInstance(generate_payload(find_request_schema(spec), 10, spec), dict)
+        self.assertIsNotNone(find_response_schema(spec))
+
+@unittest.skipIf(shutil.which('node') is None, 'Node.js is not installed')
+class TestConverterProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = ConverterProfiler(sizes=(10, 100, 1000))
+    
+    def test_profile_linear_converter(self):
+        report = self.profiler.profile(LINEAR_CONVERTER)
+        self.assertEqual(report["status"], "ok")
+        self.assertEqual(report["entry_point"], "convertRequest")
+        self.assertEqual([s["size"] for s in report["samples"]], [10, 100, 1000])
+        self.assertNotEqual(report["scaling"], "superlinear")
+    
+    def test_profile_quadratic_converter(self):
+        report = ConverterProfiler(sizes=(400, 1600, 6400)).profile(QUADRATIC_CONVERTER)
+        self.assertEqual(report["status"], "ok")
+        self.assertEqual(report["scaling"], "superlinear")
+        violations, warnings = evaluate_budget("request_converter", report, budget_ms=1000)
+        self.assertEqual(violations, [])
+        self.assertEqual(len(warnings), 1)
+    
+    def test_budget_violation(self):
+        report = self.profiler.profile(LINEAR_CONVERTER)
+        violations, _ = evaluate_budget("request_converter", report, budget_ms=0)
+        self.assertEqual(len(violations), 1)
+    
+    def test_unparseable_converter_is_a_warning(self):
+        report = self.profiler.profile("function convert(request: any) { return request; }")
+        self.assertEqual(report["status"], "error")
+        violations, warnings = evaluate_budget("request_converter", report, budget_ms=0)
+        self.assertEqual(violations, [])
+        self.assertEqual(len(warnings), 1)
+    
+    def test_apigee_request_converter(self):
+        report = self.profiler.profile(APIGEE_REQUEST_CONVERTER, role='request')
+        self.assertEqual(report["status"], "ok", report.get("error"))
+        self.assertEqual(report["entry_point"], "script")
+        self.assertLess(report["samples"][0]["payload_bytes"], report["samples"][-1]["payload_bytes"])
+    
+    def test_apigee_converter_with_const(self):
+        # Each run gets a fresh context, so top-level const/let can be redeclared
+        report = self.profiler.profile(APIGEE_CONST_CONVERTER, role='request')
+        self.assertEqual(report["status"], "ok", report.get("error"))
+        self.assertEqual(report["entry_point"], "script")
+        violations, _ = evaluate_budget("request_converter", report, budget_ms=1000)
+        self.assertEqual(violations, [])
+    
+    def test_apigee_response_converter(self):
+        report = self.profiler.profile(APIGEE_RESPONSE_CONVERTER, role='response')
+        self.assertEqual(report["status"], "ok", report.get("error"))
+        self.assertEqual(report["entry_point"], "convertResponse")
+    
+    def test_entry_point_follows_role(self):
+        with open(os.path.join(os.path.dirname(__file__), 'api_converter.js')) as f:
+            script = f.read()
+        request_report = self.profiler.profile(script, role='request')
+        response_report = self.profiler.profile(script, role='response')
+        self.assertEqual(request_report["entry_point"], "convertRequestToNewFormat")
+        self.assertEqual(response_report["entry_point"], "convertResponseToLegacyFormat")
+    
+    @unittest.skipUnless(typescript_available(), 'TypeScript compiler is not installed')
+    def test_typescript_converter(self):
+        report = self.profiler.profile(TYPESCRIPT_CONVERTER, role='request')
+        self.assertEqual(report["status"], "ok", report.get("error"))
+        self.assertEqual(report["entry_point"], "convertRequest")
+    
+    def test_converter_cannot_reach_host(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = os.path.join(temp_dir, 'pwned')
+            escape = (
+                "const host = this.constructor.constructor('return process')();\n"
+                f"host.getBuiltinModule('fs').writeFileSync({target!r}, 'x');\n"
+                "module.exports = function (request) { return request; };"
+            )
+            report = self.profiler.profile(escape)
+            self.assertEqual(report["status"], "error")
+            self.assertFalse(os.path.exists(target))
+    
+    def test_converter_sees_empty_environment(self):
+        script = (
+            "const host = this.constructor.constructor('return process')();\n"
+            "if (Object.keys(host.env).length) throw new Error('environment leaked');\n"
+            "module.exports = function (request) { return request; };"
+        )
+        report = self.profiler.profile(script)
+        self.assertEqual(report["status"], "ok", report.get("error"))
+    
+    def test_limits_are_set_without_preexec_fn(self):
+        # preexec_fn is not safe in a threaded server; prlimit sets the limits
+        self.assertNotIn("preexec_fn", self.profiler._sandbox_options())
+        command = self.profiler._sandbox_command()
+        self.assertEqual(os.path.basename(command[0]), "prlimit")
+        self.assertIn("--nofile=64", command)
+    
+    def test_timeout_is_a_violation(self):
+        profiler = ConverterProfiler(sizes=(10,), timeout=2)
+        report = profiler.profile("function convert(request) { while (true) {} }")
+        self.assertEqual(report["status"], "timeout")
+        violations, _ = evaluate_budget("request_converter", report, budget_ms=1000)
+        self.assertEqual(len(violations), 1)
+
+if __name__ == '__main__':
+    unittest.main()
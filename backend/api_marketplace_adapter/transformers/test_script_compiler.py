@@ -0,0 +1,21 @@
+import shutil
+import unittest
+from api_marketplace_adapter.transformers.script_compiler import compile_script
+
+@unittest.skipIf(shutil.which('node') is None, 'Node.js is not installed')
+class TestScriptCompiler(unittest.TestCase):
+    def test_valid_javascript(self):
+        result = compile_script('module.exports = function (request) { return request; };')
+        self.assertTrue(result['checked'])
+        self.assertIsNone(result['error'])
+    
+    def test_syntax_error(self):
+        result = compile_script('function convert(request) { return request')
+        self.assertIsNotNone(result['error'])
+    
+    def test_script_is_not_executed(self):
+        result = compile_script('throw new Error("executed");')
+        self.assertIsNone(result['error'])
+
+if __name__ == '__main__':
+    unittest.main()
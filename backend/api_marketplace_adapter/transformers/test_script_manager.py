@@ -63,6 +63,18 @@ class TestScriptManager(unittest.TestCase):
         scripts = self.script_manager.list_scripts()
         self.assertIn(self.test_script_name, scripts)
         self.assertIn(another_script, scripts)
+    
+    def test_list_scripts_after_removal(self):
+        # Fill the index, then remove a script behind the manager's back
+        self.assertIn(self.test_script_name, self.script_manager.list_scripts())
+        os.remove(os.path.join(self.test_dir, self.test_script_name))
+        
+        # Move the directory mtime forward in case the filesystem is coarse
+        stat = os.stat(self.test_dir)
+        os.utime(self.test_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        
+        # Verify the removed script is no longer listed
+        self.assertNotIn(self.test_script_name, self.script_manager.list_scripts())
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Startup-time benchmark for the API Marketplace Adapter.
+
+Measures, in fresh interpreters, how long it takes to import the Flask app
+and to serve the first /health request, and the cost of the first warmup.
+
+With --baseline the import step also does the work the app used to do at
+import time (importing the Anthropic SDK, building the client and running
+the template checks), so the two modes can be compared on one machine.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--baseline | --compare]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import sys, time
+baseline = sys.argv[1] == 'baseline'
+t0 = time.perf_counter()
+from api_marketplace_adapter.app import app, warmup
+if baseline:
+    import anthropic
+    anthropic.Anthropic(api_key='benchmark')
+    warmup()
+t1 = time.perf_counter()
+app.test_client().get('/health')
+t2 = time.perf_counter()
+warmup()
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t0, t3 - t2, 'anthropic' in sys.modules)
+"""
+
+
+def run_once(mode):
+    env = dict(os.environ, LOG_FILE=os.devnull)
+    result = subprocess.run(
+        [sys.executable, "-c", SNIPPET, mode],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    import_s, health_s, warmup_s, anthropic_loaded = result.stdout.split()
+    return float(import_s), float(health_s), float(warmup_s), anthropic_loaded == "True"
+
+
+def report(mode, runs):
+    samples = [run_once(mode) for _ in range(runs)]
+    print(f"[{mode}]")
+    for label, index in (("import app", 0), ("first /health", 1), ("warmup", 2)):
+        values = [sample[index] * 1000 for sample in samples]
+        print(f"{label:<14} median {statistics.median(values):8.1f} ms  "
+              f"min {min(values):8.1f} ms")
+    print(f"anthropic imported at startup: {any(sample[3] for sample in samples)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--baseline", action="store_true",
+                       help="emulate the old eager import path")
+    group.add_argument("--compare", action="store_true",
+                       help="run the baseline and the current path")
+    args = parser.parse_args()
+
+    if args.compare:
+        modes = ["baseline", "lazy"]
+    else:
+        modes = ["baseline" if args.baseline else "lazy"]
+    for mode in modes:
+        report(mode, args.runs)
+
+
+if __name__ == "__main__":
+    main()
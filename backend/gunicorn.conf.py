@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the API Marketplace Adapter.
+
+Run with: gunicorn -c gunicorn.conf.py
+"""
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5555')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+wsgi_app = "api_marketplace_adapter.__main__:app"
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = True
+
+
+def when_ready(server):
+    """Load templates and the script index in the master before forking."""
+    from api_marketplace_adapter.app import warmup
+    warmup()